@@ -11,27 +11,40 @@ Usage:
     ...         print(line)
 
 """
+import io
 import os
+import re
 import sys
 import gzip
+import mmap
+import queue
 import pickle
-import struct
+import string
+import threading
 import numpy as np
 import pandas as pd
 from scipy.stats import iqr
-from bisect import bisect_right
 from urllib.parse import unquote
 from collections import OrderedDict
-from functools import total_ordering
-from collections.abc import MutableSet
 
-_gzip_header = struct.Struct('<3B')
-_true_header = (31, 139, 8)
+try:
+    # ISA-L's SIMD inflate is a drop-in for the zlib-backed stdlib gzip
+    from isal import igzip as _gzip
+except ImportError:
+    _gzip = gzip
+
+try:
+    import indexed_gzip
+except ImportError:
+    indexed_gzip = None
+
+_GFF_COLS = ('seqid', 'source', 'type', 'start', 'end', 'score',
+             'strand', 'phase', 'attributes')
 
 
 def _is_version_3(filename, gzipped=False):
     if gzipped:
-        gff = gzip.open(filename, 'rb')
+        gff = _gzip.open(filename, 'rb')
     else:
         gff = open(filename, 'r')
     version = int(gff.readline().strip().split()[1])
@@ -40,79 +53,183 @@ def _is_version_3(filename, gzipped=False):
 
 def _is_zipped(filename):
     with open(filename, 'rb') as check:
-        header = _gzip_header.unpack_from(check.peek(struct.calcsize('<3B')))
-        return True if header == _true_header else False
+        return check.read(3) == b'\x1f\x8b\x08'
+
+
+_ATTR_RE = re.compile(r'([^=;]+)=([^;]*)')
+
+
+def _unquote(value):
+    # Most attribute values carry no %HH escapes, so skip urllib's decoding
+    # state machine unless one is actually present
+    if '%' in value:
+        return unquote(value)
+    return value
 
 
 def _parse_attrs(attribute_column):
     attr_dict = {}
-    for attr in attribute_column.split(';'):
-        tag, values = attr.split('=')
-        for val in values.split(','):
-            attr_dict.setdefault(tag, []).append(unquote(val))
+    for tag, values in _ATTR_RE.findall(attribute_column):
+        attr_dict.setdefault(tag, []).extend(_unquote(val) for val in values.split(','))
     return attr_dict
 
 
-class OrderedSet(MutableSet):
-
-    def __init__(self, iterable=None):
-        self.end = end = [] 
-        end += [None, end, end]         # sentinel node for doubly linked list
-        self.map = {}                   # key --> [key, prev, next]
-        if iterable is not None:
-            self |= iterable
+def _convert_fields(fields):
+    seqid, source, type, start, end, score, strand, phase, attrs = fields
+    return (seqid, source, type, int(start), int(end),
+            score if score == '.' else float(score),
+            strand, phase if phase == '.' else int(phase), attrs)
+
+
+try:
+    # Optional Cython build of the per-line hot path (see pygff/_core.pyx)
+    from pygff import _core
+    _parse_line = _core.parse_line
+    _parse_attrs = _core.parse_attrs
+except ImportError:
+    _core = None
+
+    def _parse_line(line):
+        if isinstance(line, str):
+            line = line.encode('utf-8')
+        seqid, source, type, start, end, score, strand, phase, attrs = \
+                line.strip().split(b'\t')
+        return (seqid.decode('utf-8'), source.decode('utf-8'),
+                type.decode('utf-8'), int(start), int(end),
+                '.' if score == b'.' else float(score),
+                strand.decode('utf-8'),
+                '.' if phase == b'.' else int(phase),
+                attrs.decode('utf-8'))
+
+
+class _ReadAhead:
+    """Read-ahead wrapper for compressed file handles
+
+    A background thread keeps a small queue of decompressed chunks filled, so
+    inflate work overlaps with parsing on the consumer side instead of being
+    serialized with it. Only the file methods pygff itself uses are exposed.
+    """
 
-    def __len__(self):
-        return len(self.map)
+    _chunk_size = 1 << 20
+
+    def __init__(self, handle, depth = 4):
+        self._handle = handle
+        self._depth = depth
+        self._start_worker()
+
+    def _start_worker(self):
+        self._leftover = b''
+        self._eof = False
+        self._exc = None
+        self._queue = queue.Queue(maxsize=self._depth)
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._fill, daemon=True)
+        self._worker.start()
+
+    def _fill(self):
+        while not self._stop.is_set():
+            try:
+                chunk = self._handle.read(self._chunk_size)
+            except Exception as exc:
+                self._exc = exc
+                chunk = b''
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(chunk, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            if not chunk:
+                break
+
+    def _stop_worker(self):
+        self._stop.set()
+        while self._worker.is_alive():
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._worker.join(timeout=0.01)
+
+    def _next_chunk(self):
+        if self._eof:
+            return b''
+        chunk = self._queue.get()
+        if not chunk:
+            self._eof = True
+            if self._exc is not None:
+                raise self._exc
+        return chunk
+
+    def read(self, size = -1):
+        parts = [self._leftover]
+        total = len(self._leftover)
+        self._leftover = b''
+        while size < 0 or total < size:
+            chunk = self._next_chunk()
+            if not chunk:
+                break
+            parts.append(chunk)
+            total += len(chunk)
+        data = b''.join(parts)
+        if 0 <= size < len(data):
+            data, self._leftover = data[:size], data[size:]
+        return data
+
+    def readline(self):
+        while b'\n' not in self._leftover:
+            chunk = self._next_chunk()
+            if not chunk:
+                line, self._leftover = self._leftover, b''
+                return line
+            self._leftover += chunk
+        line, sep, self._leftover = self._leftover.partition(b'\n')
+        return line + sep
+
+    def readlines(self, hint = -1):
+        # Split whole chunks at once so the per-line Python work is amortized
+        # across ~a chunk of lines per call
+        parts = [self._leftover]
+        total = len(self._leftover)
+        self._leftover = b''
+        while hint < 0 or total < hint:
+            chunk = self._next_chunk()
+            if not chunk:
+                break
+            parts.append(chunk)
+            total += len(chunk)
+        lines = b''.join(parts).splitlines(keepends=True)
+        if lines and not lines[-1].endswith(b'\n') and not self._eof:
+            self._leftover = lines.pop()
+        return lines
+
+    def seek(self, offset):
+        self._stop_worker()
+        self._handle.seek(offset)
+        self._start_worker()
 
-    def __contains__(self, key):
-        return key in self.map
+    def close(self):
+        self._stop_worker()
+        self._handle.close()
 
-    def add(self, key):
-        if key not in self.map:
-            end = self.end
-            curr = end[1]
-            curr[2] = end[1] = self.map[key] = [key, curr, end]
+    def __iter__(self):
+        return self
 
-    def discard(self, key):
-        if key in self.map:        
-            key, prev, next = self.map.pop(key)
-            prev[2] = next
-            next[1] = prev
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
 
-    def __iter__(self):
-        end = self.end
-        curr = end[2]
-        while curr is not end:
-            yield curr[0]
-            curr = curr[2]
-
-    def __reversed__(self):
-        end = self.end
-        curr = end[1]
-        while curr is not end:
-            yield curr[0]
-            curr = curr[1]
-
-    def pop(self, last=True):
-        if not self:
-            raise KeyError('set is empty')
-        key = self.end[1][0] if last else self.end[2][0]
-        self.discard(key)
-        return key
-
-    def __repr__(self):
-        if not self:
-            return '%s()' % (self.__class__.__name__,)
-        return '%s(%r)' % (self.__class__.__name__, list(self))
+    @property
+    def name(self):
+        return self._handle.name
 
-    def __eq__(self, other):
-        if isinstance(other, OrderedSet):
-            return len(self) == len(other) and list(self) == list(other)
-        return set(self) == set(other)
+    def fileno(self):
+        return self._handle.fileno()
 
 
-@total_ordering
+_ENTRY_SOURCE = string.Template(r'''\
 class GffEntry:
     """An object that represents a single GFF entry. 
 
@@ -133,7 +250,8 @@ class GffEntry:
         attributes (dict): a dictionary of all tag/value pairs
 
     """
-    __slots__ = ['_features', '_attrs', '_attributes']
+    __slots__ = ('seqid', 'source', 'type', 'start', 'end', 'score',
+            'strand', 'phase', 'attributes', '_attrs', '_key')
 
     __all__ = ['seqid', 'source', 'type', 'start', 'end', 'score',
             'strand', 'phase', 'attributes', 'has_tag', 'get_tag']
@@ -142,74 +260,57 @@ class GffEntry:
         """Initialize the object
 
         Args:
-            line(str): the string representation of GFF entry
+            line(str or bytes): the raw representation of a GFF entry
+        """
+${init_body}
+        self.attributes = _parse_attrs(self._attrs)
+        self._key = (self.seqid, self.start, self.end, self.type)
+
+    @classmethod
+    def from_prefields(cls, fields):
+        """Builds an entry from an already-split list of the 9 GFF columns
+
+        Args:
+            fields (list): the 9 tab-delimited GFF columns as strings
+
+        Returns:
+            (`pygff.GffEntry`): the constructed entry
         """
-        *self._features, self._attrs = line.strip().split('\t')
-        self._attributes = _parse_attrs(self._attrs)
+        entry = cls.__new__(cls)
+        (entry.seqid, entry.source, entry.type, entry.start, entry.end,
+                entry.score, entry.strand, entry.phase, entry._attrs) = _convert_fields(fields)
+        entry.attributes = _parse_attrs(entry._attrs)
+        entry._key = (entry.seqid, entry.start, entry.end, entry.type)
+        return entry
 
     def __len__(self):
         return self.end - self.start
 
     def __str__(self):
-        return "\t".join(self._features + [self._attrs])
+        return "\t".join((self.seqid, self.source, self.type,
+                str(self.start), str(self.end), str(self.score),
+                self.strand, str(self.phase), self._attrs))
 
     def __eq__(self, other):
-        if self.seqid == other.seqid:
-            if self.type == other.type:
-                if self.start == other.start:
-                    if self.end == other.end:
-                        return True
-        return False
+        return self._key == other._key
 
-    def __lt__(self, other):
-        if self.seqid <= other.seqid:
-            if self.start < other.start:
-                return True
-        return False
-    
-    @property
-    def seqid(self):
-        return self._features[0]
+    def __ne__(self, other):
+        return self._key != other._key
 
-    @property
-    def source(self):
-        return self._features[1]
-
-    @property
-    def type(self):
-        return self._features[2]
-
-    @property
-    def start(self):
-        return int(self._features[3])
-
-    @property
-    def end(self):
-        return int(self._features[4])
+    def __lt__(self, other):
+        return self._key < other._key
 
-    @property
-    def score(self):
-        score = self._features[5]
-        if score == '.':
-            return score
-        else:
-            return float(self._features[5])
+    def __le__(self, other):
+        return self._key <= other._key
 
-    @property
-    def strand(self):
-        return self._features[6]
+    def __gt__(self, other):
+        return self._key > other._key
 
-    @property
-    def phase(self):
-        phase = self._features[7]
-        if phase == '.':
-            return phase
-        else:
-            return int(phase)
+    def __ge__(self, other):
+        return self._key >= other._key
 
-    @property
-    def attributes(self):
-        return self._attributes
+    def __hash__(self):
+        return hash(self._key)
 
     def has_tag(self, tag):
         """Checks to see if the tag is present in the attributes column
@@ -220,7 +321,7 @@ class GffEntry:
         Returns:
             (bool): whether or not the tag is present
         """
-        return True if tag in self._attributes else False
+        return True if tag in self.attributes else False
 
     def get_tag(self, tag):
         """Retrieves the tag of interest
@@ -232,82 +333,144 @@ class GffEntry:
             (str): the value associated with the tag
 
         Raises:
-            KeyError: if the tag isn't present in the attributes column
+            KeyError: if the tag isn\'t present in the attributes column
         """
-        return self._attributes[tag]
+        return self.attributes[tag]
+''')
+
+# The GFF3 column schema is fixed, so the entry class is rendered once at
+# import time with its parse unrolled for the active backend: the compiled
+# bytecode assigns straight into slots with no property or method dispatch
+_C_INIT_BODY = """\
+        (self.seqid, self.source, self.type, self.start, self.end,
+                self.score, self.strand, self.phase, self._attrs) = _parse_line(line)"""
+
+_PY_INIT_BODY = """\
+        if isinstance(line, str):
+            line = line.encode('utf-8')
+        (seqid, source, type_, start, end,
+                score, strand, phase, attrs) = line.strip().split(b'\\t')
+        self.seqid = seqid.decode('utf-8')
+        self.source = source.decode('utf-8')
+        self.type = type_.decode('utf-8')
+        self.start = int(start)
+        self.end = int(end)
+        self.score = '.' if score == b'.' else float(score)
+        self.strand = strand.decode('utf-8')
+        self.phase = '.' if phase == b'.' else int(phase)
+        self._attrs = attrs.decode('utf-8')"""
+
+
+def _make_entry_class():
+    init_body = _PY_INIT_BODY if _core is None else _C_INIT_BODY
+    source = _ENTRY_SOURCE.substitute(init_body=init_body)
+    namespace = {'__name__': __name__, '_parse_line': _parse_line,
+                 '_parse_attrs': _parse_attrs, '_convert_fields': _convert_fields}
+    exec(compile(source, '<pygff.GffEntry>', 'exec'), namespace)
+    return namespace['GffEntry']
+
+
+GffEntry = _make_entry_class()
 
 
 def bin_estimator(data):
     thresholds = {}
     for seqid in data:
-        uniq_starts = list(data[seqid])
-        if len(uniq_starts) == 1:
+        uniq_starts = np.asarray(data[seqid], dtype=np.int64)
+        if uniq_starts.size == 1:
             thresholds[seqid] = 1
         else:
-            fd = 2 * (iqr(uniq_starts)/(len(uniq_starts)**(1./3)))
-            sturges = np.log2(len(uniq_starts)) + 1
-            min_range = min(uniq_starts)
-            max_range = max(uniq_starts)
-            full_range = max_range - min_range
-            estimator = int(np.ceil((max_range - min_range) / max(fd, sturges)))
+            fd = 2 * (iqr(uniq_starts)/(uniq_starts.size**(1./3)))
+            sturges = np.log2(uniq_starts.size) + 1
+            full_range = int(uniq_starts.max() - uniq_starts.min())
+            estimator = int(np.ceil(full_range / max(fd, sturges)))
             thresholds[seqid] = int(full_range / estimator)
     return thresholds
 
 
-def _get_thresholds(handle, gzipped = False):
-    handle.seek(0)
-    diffs = {}
-    for line in handle:
-        if gzipped:
-            line = line.decode('ascii')
-        if not line or line.startswith('#'):
-            continue
-        seqid, source, type, start, *others = line.strip().split('\t')
-        diffs.setdefault(seqid, OrderedSet()).add(int(start))
-
-    handle.seek(0)
+def _get_thresholds(df):
+    diffs = {seqid: starts.unique()
+             for seqid, starts in df.groupby('seqid', sort=False)['start']}
     return bin_estimator(diffs)
 
 
 def _gen_index(fileobject, gzipped = False):
     handle = fileobject
-    thresholds = _get_thresholds(handle, gzipped)
-    index = OrderedDict()
-    curr_pos = 0
-    curr_idx = 0
+    if gzipped:
+        data = handle.read()
+        if not data:
+            return OrderedDict()
+    else:
+        # Map the file instead of copying it through read(); the newline scan
+        # below then runs directly over the mapped pages
+        if os.fstat(handle.fileno()).st_size == 0:
+            return OrderedDict()
+        data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    # One vectorized pass over the raw buffer for line offsets, then the C
+    # parser for the seqid/start columns
+    buf = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.where(buf == 0x0A)[0]
+    line_starts = np.concatenate(([0], newlines + 1))
+    if line_starts[-1] >= buf.size:
+        line_starts = line_starts[:-1]
+    first_bytes = buf[line_starts]
+    data_lines = (first_bytes != 0x23) & (first_bytes != 0x0A)
+    offsets = line_starts[data_lines]
+    try:
+        df = pd.read_csv(io.BytesIO(data) if gzipped else data, sep='\t',
+                         header=None, comment='#', usecols=[0, 3],
+                         names=['seqid', 'start'],
+                         dtype={'seqid': str, 'start': 'int64'}, engine='c')
+    except pd.errors.EmptyDataError:
+        df = None
+    finally:
+        if not gzipped:
+            del buf
+            data.close()
+    if df is None:
+        return OrderedDict()
+    thresholds = _get_thresholds(df)
+    anchors = OrderedDict()
     curr_threshold = None
     prev_start = None
-    for line in handle:
-        if gzipped:
-            line = line.decode('ascii')
-        if line.startswith('#') or not line:
-            curr_pos += len(line)
-            continue
-        f_line = line.strip().split('\t')
-        seqid = f_line[0]
-        start = int(f_line[3])
-        if seqid not in index:
+    for seqid, start, curr_pos in zip(df['seqid'].to_numpy(),
+                                      df['start'].to_numpy(), offsets,
+                                      strict=True):
+        if seqid not in anchors:
             prev_start = None
-            curr_idx = 0
             curr_threshold = thresholds[seqid]
+            anchors[seqid] = ([], [])
         if prev_start is None or (start - prev_start) > curr_threshold:
-            index.setdefault(seqid, {'start': OrderedDict(), 'pos': OrderedDict()})
-            index[seqid]['start'].setdefault(curr_idx, start)
-            index[seqid]['pos'].setdefault(curr_idx, curr_pos)
-            curr_idx += 1
+            anchors[seqid][0].append(start)
+            anchors[seqid][1].append(curr_pos)
             prev_start = start
-        curr_pos += len(line)
+    index = OrderedDict()
+    for seqid, (starts, positions) in anchors.items():
+        starts = np.asarray(starts, dtype=np.int64)
+        # Coarse first level of every sqrt(N)-th start keeps the initial
+        # binary search inside a cache-resident array; the second level then
+        # only probes one stride-sized slice
+        stride = max(int(np.sqrt(starts.size)), 1)
+        index[seqid] = {'starts': starts,
+                        'positions': np.asarray(positions, dtype=np.int64),
+                        'coarse_starts': starts[::stride].copy(),
+                        'stride': stride}
     return index
 
 
 def _find_le(container, start):
-    'Find rightmost value less than or equal to start'
-    # Get the index/key position
-    i = bisect_right(list(container['start'].values()), start)
-    if i:
-        # give the offset
-        return container['pos'][i-1]
-    raise ValueError("{} position not within the GFF start position range".format(start))
+    'Find the offset of the rightmost anchor start less than or equal to start'
+    starts = container['starts']
+    stride = container['stride']
+    # Locate the bucket in the coarse level, then refine within its stride
+    bucket = np.searchsorted(container['coarse_starts'], start, side='right') - 1
+    if bucket < 0:
+        raise ValueError("{} position not within the GFF start position range".format(start))
+    lo = bucket * stride
+    hi = min(lo + stride, starts.size)
+    i = lo + np.searchsorted(starts[lo:hi], start, side='right')
+    # give the offset
+    return int(container['positions'][i-1])
 
 
 class GffFile:
@@ -339,25 +502,37 @@ class GffFile:
         Raises:
             TypeError if GFF file is not version 3
         """
-        if _is_zipped(filename):
-            self._handle = gzip.open(filename, 'rb')
-            gzipped = True
-        else:
-            self._handle = open(filename, 'r')
-            gzipped = False
+        gzipped = _is_zipped(filename)
+        # Check the version before any handle is wrapped so a bad file
+        # doesn't leave a _ReadAhead worker thread behind
         if not _is_version_3(filename, gzipped):
-            raise TypeError('GFF file version is {}, but must be 3'.format(version))
+            raise TypeError('GFF file is not version 3')
+        if gzipped:
+            if indexed_gzip is not None:
+                # O(1) seeks during fetch instead of re-inflating the prefix
+                raw = indexed_gzip.IndexedGzipFile(filename, spacing=1<<20)
+            else:
+                raw = _gzip.open(filename, 'rb')
+            self._handle = _ReadAhead(raw)
+        else:
+            self._handle = open(filename, 'rb')
         self._init_index(filename, index_filename, gzipped)
 
     def _init_index(self, filename, index_filename = None, gzipped = False):
         index_filename = index_filename if index_filename else filename + '.gai'
+        stamp = (os.path.getmtime(filename), os.path.getsize(filename))
         if os.path.exists(index_filename):
             with open(index_filename, 'rb') as pkl_index_in:
-                self._index = pickle.load(pkl_index_in)
-        else:
-            self._index = _gen_index(self._handle, gzipped)
-            with open(index_filename, 'wb') as pkl_index_out:
-                pickle.dump(self._index, pkl_index_out, protocol=pickle.HIGHEST_PROTOCOL)
+                cached = pickle.load(pkl_index_in)
+            # Only trust a sidecar written for this exact file state; stale
+            # or old-format sidecars are silently rebuilt
+            if isinstance(cached, dict) and cached.get('stamp') == stamp:
+                self._index = cached['index']
+                return
+        self._index = _gen_index(self._handle, gzipped)
+        with open(index_filename, 'wb') as pkl_index_out:
+            pickle.dump({'stamp': stamp, 'index': self._index},
+                        pkl_index_out, protocol=pickle.HIGHEST_PROTOCOL)
                            
     def fetch(self, seqid, start, end, type = None):
         """Generator that fetches all GFF entries within a given region. 
@@ -398,6 +573,58 @@ class GffFile:
                 else:
                     break
 
+    def fetch_df(self, seqid, start, end, type = None):
+        """Fetches all GFF entries within a given region as a pandas DataFrame
+
+        Batch counterpart to `fetch`: the region is read as one byte chunk
+        and parsed by the pandas C engine, so no per-entry `pygff.GffEntry`
+        objects are built.
+
+        Args:
+            seqid (str): name of the chromosome of scaffold
+            start (int): start position of the feature (1-indexed)
+            end (int): end position of the feature (1-indexed)
+            type (str): GFF feature type (default: None)
+
+        Returns:
+            (`pandas.DataFrame`): one row per GFF entry in the region
+        """
+        start_offset = _find_le(self._index[seqid], start)
+        self._handle.seek(start_offset)
+        target = seqid.encode('utf-8')
+        lines = []
+        walking = True
+        while walking:
+            batch = self._handle.readlines(1 << 20)
+            if not batch:
+                break
+            for line in batch:
+                if line.startswith(b'#'):
+                    continue
+                f_seqid, _, _, f_start, _ = line.split(b'\t', 4)
+                if f_seqid == target:
+                    # Went too far right
+                    if int(f_start) >= end:
+                        walking = False
+                        break
+                    lines.append(line)
+                # Wrong contig
+                elif f_seqid < target:
+                    continue
+                else:
+                    walking = False
+                    break
+        if not lines:
+            return pd.DataFrame(columns=list(_GFF_COLS))
+        df = pd.read_csv(io.BytesIO(b''.join(lines)), sep='\t', header=None,
+                         names=list(_GFF_COLS),
+                         dtype={'seqid': str, 'start': 'int64', 'end': 'int64'},
+                         engine='c')
+        df = df[(df['end'] >= start) & (df['start'] < end)]
+        if type is not None:
+            df = df[df['type'] == type]
+        return df.reset_index(drop=True)
+
     def _readline(self):
         return self._handle.readline()
 
@@ -406,9 +633,7 @@ class GffFile:
 
     def __next__(self):
         for line in self._handle:
-            if type(line) == bytes:
-                line = line.decode('ascii')
-            if line.startswith('#'):
+            if line.startswith(b'#'):
                 continue
             else:
                 return GffEntry(line)
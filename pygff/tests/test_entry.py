@@ -0,0 +1,31 @@
+import pygff.core as gfp
+import pytest
+
+line = 'chr1\ttest\tgene\t100\t500\t0.9\t+\t.\tID=gene1;Name=Gene%201\n'
+
+def test_parsed_fields():
+    entry = gfp.GffEntry(line)
+    assert entry.seqid == 'chr1'
+    assert entry.start == 100
+    assert entry.end == 500
+    assert entry.score == 0.9
+    assert entry.phase == '.'
+
+def test_from_prefields():
+    entry = gfp.GffEntry.from_prefields(line.strip().split('\t'))
+    assert entry.type == 'gene'
+    assert entry.get_tag('Name') == ['Gene 1']
+
+def test_str_roundtrip():
+    entry = gfp.GffEntry(line)
+    assert str(entry) == line.strip()
+
+def test_ordering():
+    early = gfp.GffEntry(line)
+    late = gfp.GffEntry(line.replace('\t100\t', '\t400\t'))
+    later_seqid = gfp.GffEntry(line.replace('chr1', 'chr2'))
+    assert early < late < later_seqid
+    assert later_seqid >= late >= early
+    assert not later_seqid < late
+    assert early == gfp.GffEntry(line)
+    assert len({early, gfp.GffEntry(line), late}) == 2
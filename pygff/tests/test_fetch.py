@@ -0,0 +1,41 @@
+import os
+import pygff.core as gfp
+import pytest
+
+data_path = os.path.join(os.path.dirname(gfp.__file__), 'tests', 'data')
+
+def _open(tmp_path):
+    return gfp.GffFile(os.path.join(data_path, 'fetch_test.gff'),
+                       index_filename=str(tmp_path / 'fetch_test.gai'))
+
+def test_fetch_region(tmp_path):
+    with _open(tmp_path) as g3:
+        ids = [entry.get_tag('ID') for entry in g3.fetch('chr1', 250, 9400)]
+    assert ids == [['gene1'], ['mRNA1'], ['exon2'], ['gene2']]
+
+def test_fetch_type(tmp_path):
+    with _open(tmp_path) as g3:
+        ids = [entry.get_tag('ID') for entry in g3.fetch('chr1', 250, 9400, type='exon')]
+    assert ids == [['exon2']]
+
+def test_fetch_df(tmp_path):
+    with _open(tmp_path) as g3:
+        df = g3.fetch_df('chr1', 250, 9400)
+    assert list(df.columns) == list(gfp._GFF_COLS)
+    assert df['attributes'].str.startswith(('ID=gene1', 'ID=mRNA1', 'ID=exon2', 'ID=gene2')).all()
+    assert len(df) == 4
+
+def test_fetch_df_empty(tmp_path):
+    with _open(tmp_path) as g3:
+        df = g3.fetch_df('chr2', 900, 1000)
+    assert df.empty
+
+def test_fetch_df_numeric_seqid(tmp_path):
+    gff = tmp_path / 'numeric.gff'
+    gff.write_text('##gff-version 3\n'
+                   '1\ttest\tgene\t100\t500\t.\t+\t.\tID=gene1\n'
+                   '1\ttest\tgene\t9000\t9500\t.\t+\t.\tID=gene2\n')
+    with gfp.GffFile(str(gff), index_filename=str(tmp_path / 'numeric.gai')) as g3:
+        df = g3.fetch_df('1', 100, 600)
+    assert df['seqid'].tolist() == ['1']
+    assert len(df[df['seqid'] == '1']) == 1
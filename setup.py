@@ -1,8 +1,18 @@
-from setuptools import setup
+from setuptools import setup, Extension
 import os
 import sys
 from os import path
 
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    cythonize = None
+
+if cythonize is not None and path.exists('pygff/_core.pyx'):
+    ext_modules = cythonize([Extension('pygff._core', ['pygff/_core.pyx'])])
+else:
+    ext_modules = []
+
 
 __version__ = '0.0.1'
 
@@ -29,7 +39,8 @@ setup(
         'pandas',
     ],
     packages = ['pygff', 'pygff.tests'],
-    package_data = {'pygff': ['LICENSE', 'CODE_OF_CONDUCT.md', 'pygff/tests/data/*']}
+    package_data = {'pygff': ['LICENSE', 'CODE_OF_CONDUCT.md', 'pygff/tests/data/*']},
+    ext_modules = ext_modules,
     classifiers = [
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',